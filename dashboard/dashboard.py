@@ -1,10 +1,13 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import os
+import io
 import re
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 # --- Page Configuration ---
 st.set_page_config(page_title="Dutch Social Monitor", page_icon="nl", layout="wide")
@@ -22,38 +25,106 @@ st.markdown("Real-time sentiment and thematic analysis of Dutch political and so
 
 # --- Connect to Supabase via REST (no SDK needed) ---
 import requests as req
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+class SupabaseError(Exception):
+    pass
 
 def get_creds():
     url = os.environ.get("SUPABASE_URL") or st.secrets.get("SUPABASE_URL", "")
     key = os.environ.get("SUPABASE_KEY") or st.secrets.get("SUPABASE_KEY", "")
     return url.strip(), key.strip()
 
-def sb_fetch(table, params=None):
+# One pooled keep-alive session shared by every fetch
+@st.cache_resource
+def get_session():
     url, key = get_creds()
     if not url or not key:
-        st.error("Missing SUPABASE_URL or SUPABASE_KEY in secrets.")
-        st.stop()
-    headers = {"apikey": key, "Authorization": "Bearer " + key}
-    r = req.get(url + "/rest/v1/" + table, headers=headers, params=params or {}, timeout=30)
+        raise SupabaseError("Missing SUPABASE_URL or SUPABASE_KEY in secrets.")
+    session = req.Session()
+    session.headers.update({"apikey": key, "Authorization": "Bearer " + key})
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504], raise_on_status=False)
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry))
+    return url + "/rest/v1/", session
+
+# HTTP and parsing only, so it is safe on worker threads. Failures raise and
+# are reported by run_or_stop on the script thread.
+def sb_fetch(conn, table, params=None):
+    base_url, session = conn
+    r = session.get(base_url + table, params=params or {}, timeout=30)
     if r.status_code != 200:
-        st.error("Supabase error " + str(r.status_code) + ": " + r.text[:200])
+        raise SupabaseError("Supabase error " + str(r.status_code) + ": " + r.text[:200])
+    # Parse the body straight into Arrow-backed columns
+    return pd.read_json(io.BytesIO(r.content), orient="records", dtype_backend="pyarrow")
+
+def run_or_stop(loader, *args):
+    try:
+        return loader(*args)
+    except (SupabaseError, req.RequestException) as e:
+        st.error(str(e))
         st.stop()
-    return r.json()
 
 # --- Fetch & Prepare Data ---
-@st.cache_data(ttl=600)
-def load_data():
-    rows = sb_fetch("dashboard_tweets", {"limit": "5000", "order": "published_at.desc"})
-    df = pd.DataFrame(rows)
+SENTIMENT_MAP = {"positive": 1, "neutral": 0, "negative": -1}
+SENTIMENT_DTYPE = pd.CategoricalDtype(["positive", "neutral", "negative", "unknown"])
+# Sample used by the keyword deep dive, capped at Supabase's 1000-row max.
+# The summary and distribution charts cover all tweets; the trend covers
+# the last TREND_DAYS days.
+RECENT_TWEETS = 1000
+# Keeps the trend at <= 4 labels x 180 days, under Supabase's 1000-row cap
+TREND_DAYS = 180
+
+def prepare_tweets(df):
     if df.empty:
         return df
-    df = df.drop_duplicates(subset=["tweet_id"])
-    df["sentiment_label"] = df["sentiment_label"].astype(str).str.lower()
-    sentiment_map = {"positive": 1, "neutral": 0, "negative": -1}
-    df["sentiment_value"] = df["sentiment_label"].map(sentiment_map).fillna(0)
+    # Only the keyword deep dive reads text, and it matches lowercase
+    df["text_lower"] = df.pop("text").astype("string[pyarrow]").str.lower()
+    df["topic"] = df["topic"].astype("category")
+    df["sentiment_label"] = df["sentiment_label"].astype("string[pyarrow]").str.lower().astype(SENTIMENT_DTYPE).fillna("unknown")
+    df["sentiment_code"] = df["sentiment_label"].cat.codes.astype("int8")
     return df
 
-df = load_data()
+def summarise_topic_counts(counts):
+    if counts.empty:
+        return counts, counts
+    counts["weighted"] = counts["sentiment_label"].map(SENTIMENT_MAP).fillna(0) * counts["tweet_count"]
+    stats = counts.groupby("topic", sort=False).agg(
+        Volume=("tweet_count", "sum"),
+        Weighted=("weighted", "sum")
+    ).reset_index()
+    stats["Net_Sentiment"] = stats["Weighted"] / stats["Volume"]
+    return counts, stats[["topic", "Volume", "Net_Sentiment"]]
+
+# Chart aggregates are computed in Postgres (see database/schema.sql). The
+# three fetches are independent, so they run concurrently; the workers only
+# do HTTP and parsing, and any failure re-raises here through .result().
+@st.cache_data(ttl=600)
+def load_data():
+    conn = get_session()
+    cutoff = (pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=TREND_DAYS)).date().isoformat()
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        f_df = ex.submit(sb_fetch, conn, "dashboard_tweets", {
+            "select": "topic,text,sentiment_label",
+            "limit": str(RECENT_TWEETS),
+            "order": "published_at.desc",
+        })
+        f_counts = ex.submit(sb_fetch, conn, "topic_sentiment_counts")
+        f_trend = ex.submit(sb_fetch, conn, "daily_sentiment_counts", {"date": "gte." + cutoff, "order": "date.asc"})
+        df, counts, trend = f_df.result(), f_counts.result(), f_trend.result()
+    counts, stats = summarise_topic_counts(counts)
+    return prepare_tweets(df), counts, stats, trend.rename(columns={"tweet_count": "count"})
+
+# Ordering and the row cap are applied by PostgREST, not pandas
+@st.cache_data(ttl=600)
+def load_top_tweets(limit=500):
+    return sb_fetch(get_session(), "dashboard_tweets", {
+        "select": "topic,sentiment_label,sentiment_score,text,author,published_at",
+        "order": "sentiment_score.desc.nullslast",
+        "limit": str(limit),
+    })
+
+df, counts, stats, trend = run_or_stop(load_data)
 
 if df.empty:
     st.warning("No data found yet. Run the GitHub Actions pipeline first!")
@@ -61,11 +132,12 @@ if df.empty:
 
 # --- Executive Summary ---
 st.subheader("Executive Summary")
+st.caption("Across all collected tweets.")
 c1, c2, c3, c4 = st.columns(4)
-c1.metric("Total Tweets", f"{len(df):,}")
-c2.metric("Most Discussed", df["topic"].mode()[0] if "topic" in df.columns else "-")
-c3.metric("Most Positive Topic", df.groupby("topic")["sentiment_value"].mean().idxmax() if "topic" in df.columns else "-")
-c4.metric("Most Negative Topic", df.groupby("topic")["sentiment_value"].mean().idxmin() if "topic" in df.columns else "-")
+c1.metric("Total Tweets", f"{int(stats['Volume'].sum()):,}" if not stats.empty else "-")
+c2.metric("Most Discussed", stats.loc[stats["Volume"].idxmax(), "topic"] if not stats.empty else "-")
+c3.metric("Most Positive Topic", stats.loc[stats["Net_Sentiment"].idxmax(), "topic"] if not stats.empty else "-")
+c4.metric("Most Negative Topic", stats.loc[stats["Net_Sentiment"].idxmin(), "topic"] if not stats.empty else "-")
 
 st.markdown("---")
 
@@ -73,12 +145,7 @@ st.markdown("---")
 st.subheader("Volume & Net Sentiment per Topic")
 st.markdown("Bar height = tweet volume. Color = average sentiment (green = positive, red = negative).")
 
-if "topic" in df.columns:
-    stats = df.groupby("topic").agg(
-        Volume=("tweet_id", "count"),
-        Net_Sentiment=("sentiment_value", "mean")
-    ).reset_index()
-
+if not stats.empty:
     fig = px.bar(
         stats, x="topic", y="Volume", color="Net_Sentiment",
         color_continuous_scale=["#e74c3c", "#95a5a6", "#2ecc71"],
@@ -93,8 +160,8 @@ st.markdown("---")
 # --- Sentiment Distribution ---
 st.subheader("Sentiment Distribution per Topic")
 
-if "topic" in df.columns and "sentiment_label" in df.columns:
-    dist = df.groupby(["topic", "sentiment_label"]).size().reset_index(name="Count")
+if not counts.empty:
+    dist = counts.rename(columns={"tweet_count": "Count"})
     fig2 = px.bar(
         dist, x="topic", y="Count", color="sentiment_label",
         barmode="stack", barnorm="percent",
@@ -108,8 +175,9 @@ st.markdown("---")
 
 # --- Keyword Deep Dive ---
 st.subheader("Topic Deep Dive: Top Keywords")
+st.caption(f"Based on the latest {RECENT_TWEETS:,} tweets.")
 
-DUTCH_STOPWORDS = {
+DUTCH_STOPWORDS = frozenset({
     "de","en","van","ik","te","dat","die","in","een","hij","het","niet",
     "zijn","is","was","op","aan","met","als","voor","had","er","maar","om",
     "hem","dan","zou","of","wat","mijn","men","dit","zo","door","over","ze",
@@ -119,29 +187,40 @@ DUTCH_STOPWORDS = {
     "meer","doen","toen","moet","ben","zonder","kan","hun","dus","alles",
     "onder","ja","twee","laat","wel","we","ons","wij","wie","gaan","na",
     "via","welke","steeds","rt","https","t","co","amp"
-}
+})
+
+URL_MENTION_RE = re.compile(r"http\S+|www\.\S+|@\w+")
+WORD_RE = re.compile(r"\b[a-z]{3,}\b")
 
-def top_words(texts, n=15):
-    words = []
+def top_words(texts, n=15):  # texts must already be lowercase
+    words = Counter()
     for t in texts:
         if isinstance(t, str):
-            clean = re.sub(r"http\S+|www\.\S+|@\w+", "", t.lower())
-            tokens = re.findall(r"\b[a-z]{3,}\b", clean)
-            words.extend([w for w in tokens if w not in DUTCH_STOPWORDS])
-    return Counter(words).most_common(n)
+            clean = URL_MENTION_RE.sub("", t)
+            words.update(w for w in WORD_RE.findall(clean) if w not in DUTCH_STOPWORDS)
+    return words.most_common(n)
 
-if "topic" in df.columns:
+# Keyed on topic only, so revisiting a topic is a cache hit
+@st.cache_data(ttl=600)
+def topic_keywords(topic):
+    tdf = load_data()[0]
+    tdf = tdf[tdf["topic"] == topic]
+    kw_df = pd.DataFrame(top_words(tdf["text_lower"].dropna()), columns=["Word", "Frequency"])
+    # Count labels straight off the int8 codes (positive, neutral, negative, unknown)
+    n_pos, _, n_neg, _ = np.bincount(tdf["sentiment_code"].to_numpy(), minlength=len(SENTIMENT_DTYPE.categories))
+    return len(tdf), (n_pos - n_neg) / len(tdf), kw_df
+
+# Runs as a fragment so picking a topic only reruns this block
+@st.fragment
+def render_keyword_deep_dive(df):
     col1, col2 = st.columns([1, 2])
     with col1:
-        topic = st.selectbox("Choose a topic:", sorted(df["topic"].unique()))
-        tdf   = df[df["topic"] == topic]
-        st.write(f"**Tweets:** {len(tdf)}")
-        avg = tdf["sentiment_value"].mean()
+        topic = st.selectbox("Choose a topic:", df["topic"].cat.categories)
+        n_tweets, avg, kw_df = run_or_stop(topic_keywords, topic)
+        st.write(f"**Tweets:** {n_tweets}")
         st.write("**Sentiment:** " + ("Positive" if avg > 0 else "Negative" if avg < -0.1 else "Neutral"))
 
     with col2:
-        kws   = top_words(tdf["text"].dropna())
-        kw_df = pd.DataFrame(kws, columns=["Word", "Frequency"])
         fig3  = px.bar(
             kw_df, x="Frequency", y="Word", orientation="h",
             title="Top Keywords: " + topic,
@@ -150,30 +229,32 @@ if "topic" in df.columns:
         fig3.update_layout(yaxis={"categoryorder": "total ascending"}, plot_bgcolor="rgba(0,0,0,0)")
         st.plotly_chart(fig3, use_container_width=True)
 
+if "topic" in df.columns:
+    render_keyword_deep_dive(df)
+
 st.markdown("---")
 
 # --- Sentiment Trend Over Time ---
 st.subheader("Sentiment Trend Over Time")
+st.caption(f"Last {TREND_DAYS} days.")
 
-if "published_at" in df.columns and "sentiment_label" in df.columns:
-    df["date"] = pd.to_datetime(df["published_at"], utc=True).dt.date
-    trend = df.groupby(["date", "sentiment_label"]).size().reset_index(name="count")
+if not trend.empty:
     fig4  = px.line(
         trend, x="date", y="count", color="sentiment_label",
         color_discrete_map={"positive": "#2ecc71", "negative": "#e74c3c", "neutral": "#95a5a6"},
-        markers=True,
+        markers=trend["date"].nunique() <= 90,
+        render_mode="webgl",
         labels={"date": "Date", "count": "Tweets", "sentiment_label": "Sentiment"}
     )
-    fig4.update_layout(plot_bgcolor="rgba(0,0,0,0)")
+    fig4.update_layout(plot_bgcolor="rgba(0,0,0,0)", hovermode="x unified", uirevision="static")
     st.plotly_chart(fig4, use_container_width=True)
 
 st.markdown("---")
 
 # --- Raw Data Explorer ---
 with st.expander("View Raw Dataset"):
-    cols = [c for c in ["topic","sentiment_label","sentiment_score","text","author","published_at"] if c in df.columns]
     st.dataframe(
-        df[cols].sort_values("sentiment_score", ascending=False) if "sentiment_score" in df.columns else df[cols],
+        run_or_stop(load_top_tweets),
         use_container_width=True,
         hide_index=True
     )
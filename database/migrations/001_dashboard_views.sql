@@ -0,0 +1,23 @@
+-- ============================================================
+-- Migration 001 — Pre-aggregated views for the Dashboard
+-- For projects created before these views were added to schema.sql.
+-- Safe to re-run: only CREATE OR REPLACE VIEW statements.
+-- Run in: Supabase Dashboard > SQL Editor
+-- ============================================================
+
+CREATE OR REPLACE VIEW topic_sentiment_counts AS
+SELECT
+    topic,
+    COALESCE(LOWER(sentiment_label), 'unknown') AS sentiment_label,
+    COUNT(*)                                    AS tweet_count
+FROM dashboard_tweets
+GROUP BY 1, 2;
+
+CREATE OR REPLACE VIEW daily_sentiment_counts AS
+SELECT
+    (published_at AT TIME ZONE 'UTC')::DATE     AS date,
+    COALESCE(LOWER(sentiment_label), 'unknown') AS sentiment_label,
+    COUNT(*)                                    AS tweet_count
+FROM dashboard_tweets
+WHERE published_at IS NOT NULL
+GROUP BY 1, 2;
@@ -0,0 +1,20 @@
+-- ============================================================
+-- Migration 002 — NLP work queue view
+-- For projects created before unprocessed_tweets was added to schema.sql.
+-- Safe to re-run: only CREATE OR REPLACE VIEW statements.
+-- Run in: Supabase Dashboard > SQL Editor
+-- ============================================================
+
+CREATE OR REPLACE VIEW unprocessed_tweets AS
+SELECT
+    r.tweet_id,
+    r.topic,
+    r.text,
+    r.likes,
+    r.retweets,
+    r.scraped_at
+FROM raw_tweets r
+WHERE NOT EXISTS (
+    SELECT 1 FROM tweet_analysis a WHERE a.tweet_id = r.tweet_id
+)
+ORDER BY r.scraped_at DESC;
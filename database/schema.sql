@@ -96,7 +96,48 @@ LEFT JOIN tweet_analysis a ON r.tweet_id = a.tweet_id;
 
 
 -- ──────────────────────────────────────────────
--- 5. Row Level Security (optional but recommended)
+-- 5. Pre-aggregated views for Dashboard charts
+-- ──────────────────────────────────────────────
+CREATE OR REPLACE VIEW topic_sentiment_counts AS
+SELECT
+    topic,
+    COALESCE(LOWER(sentiment_label), 'unknown') AS sentiment_label,
+    COUNT(*)                                    AS tweet_count
+FROM dashboard_tweets
+GROUP BY 1, 2;
+
+CREATE OR REPLACE VIEW daily_sentiment_counts AS
+SELECT
+    (published_at AT TIME ZONE 'UTC')::DATE     AS date,
+    COALESCE(LOWER(sentiment_label), 'unknown') AS sentiment_label,
+    COUNT(*)                                    AS tweet_count
+FROM dashboard_tweets
+WHERE published_at IS NOT NULL
+GROUP BY 1, 2;
+
+
+-- ──────────────────────────────────────────────
+-- 6. NLP work queue  (tweets with no analysis row yet)
+-- ──────────────────────────────────────────────
+-- Anti-join, so "processed" is derived from tweet_analysis and the
+-- pipeline needs no follow-up UPDATE on raw_tweets.
+CREATE OR REPLACE VIEW unprocessed_tweets AS
+SELECT
+    r.tweet_id,
+    r.topic,
+    r.text,
+    r.likes,
+    r.retweets,
+    r.scraped_at
+FROM raw_tweets r
+WHERE NOT EXISTS (
+    SELECT 1 FROM tweet_analysis a WHERE a.tweet_id = r.tweet_id
+)
+ORDER BY r.scraped_at DESC;
+
+
+-- ──────────────────────────────────────────────
+-- 7. Row Level Security (optional but recommended)
 -- ──────────────────────────────────────────────
 ALTER TABLE raw_tweets          ENABLE ROW LEVEL SECURITY;
 ALTER TABLE tweet_analysis      ENABLE ROW LEVEL SECURITY;
@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from supabase import create_client, Client
@@ -31,18 +32,24 @@ supabase = init_connection()
 @st.cache_data(ttl=300)
 def load_data():
     # Fetch from the summary table
-    res = supabase.table("daily_topic_summary").select("*").execute()
+    res = supabase.table("daily_topic_summary").select(
+        "date,topic,cluster_label,tweet_count,positive_count,negative_count,avg_sentiment_score"
+    ).execute()
     df = pd.DataFrame(res.data)
+    count_cols = ['tweet_count', 'positive_count', 'negative_count']
+    df[count_cols] = df[count_cols].fillna(0).astype("int32")
+    df['avg_sentiment_score'] = df['avg_sentiment_score'].astype("float32")
+    df['date'] = pd.to_datetime(df['date'])
     
     # Define Categories
     social_topics = ["Migratie", "Belasting", "Mensenrechten", "Woning", "Salaris", "huisvesting", "zorg", "klimaat", "onderwijs"]
     party_topics = ["PVV", "VVD", "CDA", "GPvda", "D66", "J21", "FvD"]
     
-    df['category'] = df['topic'].apply(lambda x: "Social" if x in social_topics else ("Party" if x in party_topics else "Other"))
+    category_map = {t: "Social" for t in social_topics}
+    category_map.update({t: "Party" for t in party_topics})
+    df['category'] = df['topic'].map(category_map).fillna("Other").astype("category")
     return df
 
-df = load_data()
-
 # --- Dashboard Logic ---
 st.title("🏛️ Dutch Social Intelligence Monitor")
 st.markdown("Automated sentiment and thematic tracking for Dutch public discourse.")
@@ -50,19 +57,37 @@ st.markdown("Automated sentiment and thematic tracking for Dutch public discours
 # Create Tabs for the two dashboards
 tab_social, tab_party = st.tabs(["🌍 Social Issues Dashboard", "🗳️ Political Parties Dashboard"])
 
-def render_dashboard(data, title, color_theme):
+# Aggregates are cached per category, so tab and rerun events reuse them
+@st.cache_data(ttl=300)
+def summarise_category(category):
+    data = load_data()
+    data = data[data['category'] == category]
+    if data.empty:
+        return data, None, None
+
+    # Topline KPIs and sentiment split, from one read of the count columns
+    counts = data[['tweet_count', 'positive_count', 'negative_count']].to_numpy()
+    total_vol, pos_total, neg_total = counts.sum(axis=0)
+    kpis = {
+        'total_vol': total_vol,
+        'pos_total': pos_total,
+        'neg_total': neg_total,
+        'avg_sent': np.nanmean(data['avg_sentiment_score'].to_numpy()),
+        'primary': data['topic'].to_numpy()[counts[:, 0].argmax()],
+    }
+    trend = data.groupby('date').agg({'tweet_count':'sum', 'avg_sentiment_score':'mean'}).reset_index()
+    return data, kpis, trend
+
+def render_dashboard(category, title, color_theme):
+    data, kpis, trend = summarise_category(category)
     if data.empty:
         st.warning(f"No data available for {title}.")
         return
 
-    # Topline KPIs
-    total_vol = data['tweet_count'].sum()
-    avg_sent = data['avg_sentiment_score'].mean()
-    
     k1, k2, k3 = st.columns(3)
-    k1.metric(f"Total {title} Volume", f"{total_vol:,}")
-    k2.metric("Net Sentiment Index", f"{avg_sent:.2f}")
-    k3.metric("Primary Driver", data.loc[data['tweet_count'].idxmax(), 'topic'])
+    k1.metric(f"Total {title} Volume", f"{kpis['total_vol']:,}")
+    k2.metric("Net Sentiment Index", f"{kpis['avg_sent']:.2f}")
+    k3.metric("Primary Driver", kpis['primary'])
 
     st.markdown("---")
 
@@ -79,31 +104,28 @@ def render_dashboard(data, title, color_theme):
     with col_r:
         st.subheader("Sentiment Distribution")
         # Pie chart for high-level sentiment split
-        sent_agg = data.agg({'positive_count':'sum', 'negative_count':'sum', 'tweet_count':'sum'})
-        neu_count = sent_agg['tweet_count'] - (sent_agg['positive_count'] + sent_agg['negative_count'])
-        
+        neu_total = kpis['total_vol'] - (kpis['pos_total'] + kpis['neg_total'])
+
         fig_pie = px.pie(
             names=['Positive', 'Neutral', 'Negative'],
-            values=[sent_agg['positive_count'], neu_count, sent_agg['negative_count']],
+            values=[kpis['pos_total'], neu_total, kpis['neg_total']],
             color_discrete_sequence=['#10B981', '#94A3B8', '#EF4444'],
             hole=0.4
         )
-        st.plotly_chart(fig_pie, use_container_width=True)
+        st.plotly_chart(fig_pie, use_container_width=True, config={"displayModeBar": False})
 
     st.markdown("---")
     st.subheader(f"{title} Trend Analysis")
-    trend = data.groupby('date').agg({'tweet_count':'sum', 'avg_sentiment_score':'mean'}).reset_index()
-    fig_line = px.line(trend, x='date', y='avg_sentiment_score', markers=True, 
-                       color_discrete_sequence=[color_theme])
+    fig_line = px.line(trend, x='date', y='avg_sentiment_score', markers=len(trend) <= 90,
+                       render_mode='webgl', color_discrete_sequence=[color_theme])
     fig_line.add_hline(y=0, line_dash="dash", line_color="black")
+    fig_line.update_layout(hovermode="x unified", uirevision="static")
     st.plotly_chart(fig_line, use_container_width=True)
 
 # --- Render Social Dashboard ---
 with tab_social:
-    social_df = df[df['category'] == "Social"]
-    render_dashboard(social_df, "Social Issues", "#2563EB")
+    render_dashboard("Social", "Social Issues", "#2563EB")
 
 # --- Render Party Dashboard ---
 with tab_party:
-    party_df = df[df['category'] == "Party"]
-    render_dashboard(party_df, "Political Parties", "#DC2626")
+    render_dashboard("Party", "Political Parties", "#DC2626")